@@ -11,14 +11,30 @@ https://stackoverflow.com/questions/72894209/whatsapp-cloud-api-sending-old-mess
 https://www.perplexity.ai/search/explain-fastapi-s-backgroundta-rnpU7D19QpSxp2ZOBzNUyg
 """
 
+import asyncio
+import hmac
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable
+
+import orjson
 from fastapi import FastAPI, HTTPException, Request, BackgroundTasks
 from fastapi.responses import HTMLResponse, Response, JSONResponse
 from loguru import logger
 
 from ansari_whatsapp.services.whatsapp_conversation_manager import WhatsAppConversationManager
+from ansari_whatsapp.services.service_provider import get_ansari_client
 from ansari_whatsapp.utils.whatsapp_webhook_parser import parse_webhook_payload
 from ansari_whatsapp.utils.time_utils import is_message_too_old
-from ansari_whatsapp.utils.config import get_settings
+from ansari_whatsapp.utils.message_deduplicator import is_duplicate_message
+from ansari_whatsapp.utils.config import (
+    get_settings,
+    ALWAYS_RETURN_OK_TO_META,
+    BUSINESS_PHONE_NUMBER_ID,
+    DEPLOYMENT_TYPE,
+    UNDER_MAINTENANCE,
+    VERIFY_TOKEN_BYTES,
+)
 from ansari_whatsapp.utils.general_helpers import CORSMiddlewareWithLogging
 from ansari_whatsapp.utils.app_logger import configure_logger
 
@@ -32,6 +48,19 @@ from ansari_whatsapp.utils.app_logger import configure_logger
 # See: https://github.com/Delgan/loguru/issues/54#issuecomment-461724397
 configure_logger()
 
+# Whether the staging-only "!d " dev filter applies (constant per process, so it's evaluated once)
+_IS_STAGING = DEPLOYMENT_TYPE == "staging"
+
+# Our business phone number ID as raw bytes, used to cheaply discard misrouted webhooks before decoding their JSON
+_BUSINESS_PHONE_NUMBER_ID_BYTES = BUSINESS_PHONE_NUMBER_ID.encode()
+
+
+async def _guarded(semaphore: asyncio.Semaphore, coro_fn: Callable[..., Awaitable[Any]], *args: Any) -> None:
+    """Run a background coroutine function once a slot in the app's background tasks `semaphore` is free."""
+    async with semaphore:
+        await coro_fn(*args)
+
+
 # Helper function for webhook responses
 def create_webhook_response(
     success: bool = True,
@@ -56,13 +85,11 @@ def create_webhook_response(
     Returns:
         Response: HTTP response appropriate for current environment
     """
-    settings = get_settings()
-
     # Create response body with structured information
     response_body = {
         "success": success,
         "message": message,
-        "timestamp": int(__import__("time").time())
+        "timestamp": int(time.time())
     }
 
     if error_code:
@@ -73,7 +100,7 @@ def create_webhook_response(
 
     # When ALWAYS_RETURN_OK_TO_META is False: return proper HTTP status codes (for testing)
     # When ALWAYS_RETURN_OK_TO_META is True: always return 200 for Meta compliance
-    if not settings.ALWAYS_RETURN_OK_TO_META:
+    if not ALWAYS_RETURN_OK_TO_META:
         return JSONResponse(
             content=response_body,
             status_code=status_code if not success else 200
@@ -87,6 +114,21 @@ def create_webhook_response(
     )
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Set up the app's shared resources on startup, and close the Ansari client's connection pool on shutdown."""
+    # Bounds how many webhook background tasks may run concurrently,
+    #   so a burst of webhooks can't fan out into an unbounded number of in-flight tasks
+    # NOTE: It's created per app start (not at import time), as an asyncio semaphore gets bound to the
+    #   event loop it's first contended on, and a restarted app (e.g., per test module) may run on a new loop
+    app.state.bg_tasks_semaphore = asyncio.Semaphore(get_settings().MAX_CONCURRENT_BG_TASKS)
+    # NOTE: The client is only reached through `get_ansari_client()` (cached), which is also what the
+    #   conversation managers call, so building it here just moves its setup cost off the first webhook
+    get_ansari_client()
+    yield
+    await get_ansari_client().close()
+    # Drop the closed client so a restarted app (e.g., in tests) builds a fresh one
+    get_ansari_client.cache_clear()
 
 
 # Create FastAPI application
@@ -94,6 +136,7 @@ app = FastAPI(
     title="Ansari WhatsApp API",
     description="API for handling WhatsApp webhook requests for the Ansari service",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware with logging
@@ -130,7 +173,8 @@ async def verification_webhook(request: Request) -> str | None:
     logger.debug(f"Verification webhook received: {mode=}, {verify_token=}, {challenge=}")
 
     if mode and verify_token:
-        if mode == "subscribe" and verify_token == get_settings().META_WEBHOOK_VERIFY_TOKEN.get_secret_value():
+        # NOTE: compare_digest() performs a constant-time comparison (i.e., resistant to timing attacks)
+        if mode == "subscribe" and hmac.compare_digest(verify_token.encode(), VERIFY_TOKEN_BYTES):
             logger.info("WHATSAPP WEBHOOK VERIFIED SUCCESSFULLY!")
             # Note: Challenge must be wrapped in an HTMLResponse for Meta to accept and verify the callback
             return HTMLResponse(challenge)
@@ -154,24 +198,24 @@ async def main_webhook(request: Request, background_tasks: BackgroundTasks) -> R
     2. **Validation Checks** (returns early if conditions met):
        - Verifies the webhook is for our WhatsApp business number
        - Filters out status messages (delivered, read, etc.)
+       - Ignores duplicate deliveries of an already-received message (Meta retries)
        - Checks if service is under maintenance
        - Handles staging/local development routing (temporary workaround)
        - Validates message age (rejects messages older than configured threshold)
-       - Verifies user registration status
-       - Filters unsupported message types (non-text messages)
     
-    3. **Background Processing**:
+    3. **Background Processing** (after the response is returned to Meta):
        - Starts typing indicator loop (shows user that bot is processing)
-       - Processes text messages asynchronously via background tasks
+       - Verifies user registration status (registering new users)
+       - Handles unsupported message types (non-text messages)
+       - Processes text messages
     
     **Early Return Scenarios:**
     - Wrong business number: Returns 200 with skip message
     - Status message: Returns 200 with status acknowledgment
+    - Duplicate message: Returns 200 without processing the message again
     - Maintenance mode: Sends maintenance message and returns 200
     - Staging filter: Returns 200 if message prefixed with "!d" in staging
     - Old message: Returns 200 after notifying user
-    - Registration failure: Returns 500 error response
-    - Unsupported media: Sends unsupported message and returns 200
     
     **Meta Webhook Compliance:**
     - Must respond quickly (within 20 seconds) to avoid retries
@@ -196,10 +240,21 @@ async def main_webhook(request: Request, background_tasks: BackgroundTasks) -> R
         - The staging "!d" prefix filter is a temporary workaround until dedicated test numbers
           are available for each environment.
     """
-    # Wait for the incoming webhook message to be received as JSON
+    # Wait for the incoming webhook message to be received
+    body = await request.body()
+
+    # If our phone number ID doesn't appear anywhere in the raw body, then this webhook can't be for us,
+    #   so skip it without paying for a JSON decode (webhooks that do contain it are fully verified below)
+    if _BUSINESS_PHONE_NUMBER_ID_BYTES not in body:
+        logger.debug("Ignoring webhook not intended for our WhatsApp business number")
+        return create_webhook_response(
+            success=True,
+            message="Skipping, as this webhook is not intended for our WhatsApp business number",
+            status_code=200,
+        )
+
+    data = orjson.loads(body)
 
-    data = await request.json()
-    
     # Extract message details from the webhook payload using the standalone function
     try:
         (
@@ -231,7 +286,16 @@ async def main_webhook(request: Request, background_tasks: BackgroundTasks) -> R
                 error_code="STATUS_MESSAGE"
             )
 
-        logger.debug(f"Incoming whatsapp webhook message from {from_whatsapp_number}")
+        # Terminate if Meta is re-delivering a message we've already received (e.g., after a slow 200)
+        if is_duplicate_message(message_id):
+            logger.debug("Ignoring duplicate delivery of message {}", message_id)
+            return create_webhook_response(
+                success=True,
+                message="Duplicate message ignored",
+                error_code="DUPLICATE_MESSAGE"
+            )
+
+        logger.debug("Incoming whatsapp webhook message from {}", from_whatsapp_number)
     except Exception as e:
         logger.exception(f"Error extracting message details: {e}")
         return create_webhook_response(
@@ -252,9 +316,11 @@ async def main_webhook(request: Request, background_tasks: BackgroundTasks) -> R
     )
 
     # Check if the WhatsApp service is enabled
-    if get_settings().WHATSAPP_UNDER_MAINTENANCE:
+    if UNDER_MAINTENANCE:
         # Inform the user that the service is down for maintenance
         background_tasks.add_task(
+            _guarded,
+            request.app.state.bg_tasks_semaphore,
             conversation_manager.send_whatsapp_message,
             "Ansari for WhatsApp is down for maintenance, please try again later or visit our website at https://ansari.chat.",
         )
@@ -272,7 +338,8 @@ async def main_webhook(request: Request, background_tasks: BackgroundTasks) -> R
     #   and not for the staging server.
     #   This is done by prefixing the message with "!d " (e.g., "!d what is ansari?")
     # NOTE: Obviously, this temp. solution will be removed when we get a dedicated testing number for staging testing.
-    if get_settings().DEPLOYMENT_TYPE == "staging" and incoming_msg_body.get("body", "").startswith("!d "):
+    # NOTE: `_IS_STAGING` short-circuits the body lookup entirely in local/production
+    if _IS_STAGING and incoming_msg_body.get("body", "").startswith("!d "):
         logger.debug("Incoming message is meant for a dev who's testing locally now, so will not process it in staging...")
         return create_webhook_response(
             success=False,
@@ -283,6 +350,8 @@ async def main_webhook(request: Request, background_tasks: BackgroundTasks) -> R
 
     # Start the typing indicator loop that will continue until message is processed
     background_tasks.add_task(
+        _guarded,
+        request.app.state.bg_tasks_semaphore,
         conversation_manager.send_typing_indicator_then_start_loop,
     )
 
@@ -296,35 +365,12 @@ async def main_webhook(request: Request, background_tasks: BackgroundTasks) -> R
             error_code="MESSAGE_TOO_OLD"
         )
 
-    # Check if the user's phone number is stored and register if not
-    # Returns false if user's not found and their registration fails
-    user_found: bool = await conversation_manager.check_and_register_user()
-    if not user_found:
-        background_tasks.add_task(
-            conversation_manager.send_whatsapp_message, "Sorry, we couldn't register you to our database. Please try again later."
-        )
-        return create_webhook_response(
-            success=False,
-            message="User registration failed",
-            status_code=500,
-            error_code="USER_REGISTRATION_FAILED"
-        )
-
-    # Check if the incoming message is a media type other than text
-    if incoming_msg_type != "text":
-        background_tasks.add_task(
-            conversation_manager.handle_unsupported_message,
-        )
-        return create_webhook_response(
-            success=False,
-            message="Unsupported message type handled",
-            status_code=415,
-            error_code="UNSUPPORTED_MESSAGE_TYPE"
-        )
-
-    # Process text messages sent by the WhatsApp user
+    # Register the user (if needed) and process their message, all in the background,
+    #   so that acknowledging Meta's webhook doesn't wait on any backend round trip
     background_tasks.add_task(
-        conversation_manager.handle_text_message,
+        _guarded,
+        request.app.state.bg_tasks_semaphore,
+        conversation_manager.handle_incoming_message,
     )
 
     return create_webhook_response(
@@ -356,5 +402,5 @@ if __name__ == "__main__":
         port=settings.PORT,
         reload=True,
         reload_includes=[".env"],  # Watch .env file for changes
-        log_level=get_settings().LOGGING_LEVEL.lower(),
+        log_level=settings.LOGGING_LEVEL.lower(),
     )
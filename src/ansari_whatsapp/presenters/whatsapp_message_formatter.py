@@ -5,6 +5,22 @@ import re
 
 from ansari_whatsapp.utils.language_utils import get_language_direction_from_text
 
+# Regex patterns are compiled once (at import time), rather than on every formatted message
+# Regex details:
+# (?<![\*_])  # Negative lookbehind: Ensures that the '*' is not preceded by '*' or '_'
+# \*          # Matches a literal '*'
+# ([^\*_]+?)  # Non-greedy match: Captures one or more characters that are not '*' or '_'
+# \*          # Matches a literal '*'
+# (?![\*_])   # Negative lookahead: Ensures that the '*' is not followed by '*' or '_'
+_ITALIC_PATTERN = re.compile(r"(?<![\*_])\*([^\*_]+?)\*(?![\*_])")
+# Headers with content directly after them, and headers with an empty line after them (respectively)
+_HEADER_WITH_CONTENT_PATTERN = re.compile(r"(?! )#+ \**_*(.*?)\**_*\n(?!\n)")
+_HEADER_WITH_EMPTY_LINE_PATTERN = re.compile(r"(?! )#+ \**_*(.*?)\**_*\n\n")
+# Nested list items (i.e., numbered items, and the replacements of numbered/bullet markers)
+_NUMBERED_ITEM_PATTERN = re.compile(r"^\s*\d+\.\s")
+_NUMBERED_ITEM_MARKER_PATTERN = re.compile(r"(\s*)(\d+)(\.) ")
+_BULLET_ITEM_MARKER_PATTERN = re.compile(r"(\s*)[\*-] ")
+
 
 def format_for_whatsapp(msg: str) -> str:
     """Convert conventional markdown syntax to WhatsApp's markdown syntax.
@@ -38,14 +54,11 @@ def convert_italic_syntax(text: str) -> str:
     Returns:
         str: Text with WhatsApp italic syntax
     """
-    # Regex details:
-    # (?<![\*_])  # Negative lookbehind: Ensures that the '*' is not preceded by '*' or '_'
-    # \*          # Matches a literal '*'
-    # ([^\*_]+?)  # Non-greedy match: Captures one or more characters that are not '*' or '_'
-    # \*          # Matches a literal '*'
-    # (?![\*_])   # Negative lookahead: Ensures that the '*' is not followed by '*' or '_'
-    pattern = re.compile(r"(?<![\*_])\*([^\*_]+?)\*(?![\*_])")
-    return pattern.sub(r"_\1_", text)
+    # Fast path: most messages have no '*' at all, so there's nothing for the regex to match
+    if "*" not in text:
+        return text
+
+    return _ITALIC_PATTERN.sub(r"_\1_", text)
 
 
 def convert_bold_syntax(text: str) -> str:
@@ -69,13 +82,15 @@ def convert_headers(text: str) -> str:
     Returns:
         str: Text with WhatsApp header format
     """
+    # Fast path: Skip both regex passes if the text has no header marker at all
+    if "#" not in text:
+        return text
+
     # Process headers with content directly after them
-    pattern = re.compile(r"(?! )#+ \**_*(.*?)\**_*\n(?!\n)")
-    text = pattern.sub(r"*_\1_*\n\n", text)
+    text = _HEADER_WITH_CONTENT_PATTERN.sub(r"*_\1_*\n\n", text)
 
     # Process headers with empty line after them
-    pattern = re.compile(r"(?! )#+ \**_*(.*?)\**_*\n\n")
-    return pattern.sub(r"*_\1_*\n\n", text)
+    return _HEADER_WITH_EMPTY_LINE_PATTERN.sub(r"*_\1_*\n\n", text)
 
 
 def format_nested_lists(text: str) -> str:
@@ -101,13 +116,22 @@ def format_nested_lists(text: str) -> str:
     nested_section_indent = 0
 
     for i, line in enumerate(lines):
+        # Fast path: a line that doesn't start with whitespace can't be a nested item (i.e., most lines),
+        #   so the regexes below are skipped for it (and it ends any nested section, as its indent is 0)
+        if not line[:1].isspace():
+            in_nested_section = False
+            processed_lines.append(line)
+            continue
+
         # Check for indentation to detect nesting
-        indent_match = re.match(r"^(\s+)", line) if line.strip() else None
-        current_indent = len(indent_match.group(1)) if indent_match else 0
+        # NOTE: Plain `str` methods are used instead of regexes where possible,
+        #   as they scan/copy in C without going through the regex engine
+        stripped_line = line.lstrip()
+        current_indent = len(line) - len(stripped_line) if stripped_line else 0
 
-        # Check if this is a list item (numbered or bullet)
-        is_numbered_item = re.match(r"^\s*\d+\.\s", line)
-        is_bullet_item = re.match(r"^\s*[\*-]\s", line)
+        # Check if this is a list item (numbered, e.g. "1. Item", or bullet, e.g. "- Item" / "* Item")
+        is_numbered_item = stripped_line[:1].isdecimal() and _NUMBERED_ITEM_PATTERN.match(line)
+        is_bullet_item = stripped_line[:1] in ("*", "-") and stripped_line[1:2].isspace()
 
         # Determine if we're entering, in, or exiting a nested section
         if (is_numbered_item or is_bullet_item) and current_indent > 0:
@@ -119,10 +143,10 @@ def format_nested_lists(text: str) -> str:
             # Format nested items
             if is_numbered_item:
                 # Convert nested numbered list format: "  1. Item" -> "  1 - Item"
-                line = re.sub(r"(\s*)(\d+)(\.) ", r"\1\2 - ", line)
+                line = _NUMBERED_ITEM_MARKER_PATTERN.sub(r"\1\2 - ", line)
             elif is_bullet_item:
                 # Convert nested bullet format: "  - Item" or "  * Item" -> "  -- Item"
-                line = re.sub(r"(\s*)[\*-] ", r"\1-- ", line)
+                line = _BULLET_ITEM_MARKER_PATTERN.sub(r"\1-- ", line)
 
         elif in_nested_section and current_indent < nested_section_indent:
             # We're exiting the nested section
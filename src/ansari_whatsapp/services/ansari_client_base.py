@@ -2,6 +2,11 @@
 """Defines the interface that all Ansari client implementations must follow."""
 
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+# Max number of phone numbers a client remembers as registered,
+#   so that returning users skip the "user exists" backend round trip on every message
+KNOWN_USERS_MAX_SIZE = 10_000
 
 
 class AnsariClientBase(ABC):
@@ -11,6 +16,46 @@ class AnsariClientBase(ABC):
     provide the same methods with consistent signatures.
     """
 
+    def __init__(self):
+        """Initialize the state shared by all Ansari client implementations."""
+        # Phone numbers already known to be registered with the backend (least recently seen first).
+        # NOTE: This lives on the client (not the module), so a fresh client (e.g., a new app lifespan)
+        #   re-checks every user instead of trusting registrations the backend may no longer have
+        self._known_users: OrderedDict[str, None] = OrderedDict()
+
+    def is_known_user(self, phone_num: str) -> bool:
+        """Check if a phone number was already seen registered (and mark it as the most recently seen one).
+
+        Args:
+            phone_num (str): The user's WhatsApp phone number.
+
+        Returns:
+            bool: True if the user is known to be registered, False if the backend has to be asked.
+        """
+        if phone_num not in self._known_users:
+            return False
+        self._known_users.move_to_end(phone_num)
+        return True
+
+    def remember_user(self, phone_num: str) -> None:
+        """Mark a phone number as registered, evicting the least recently seen one if the cache is full.
+
+        Args:
+            phone_num (str): The user's WhatsApp phone number.
+        """
+        self._known_users[phone_num] = None
+        self._known_users.move_to_end(phone_num)
+        if len(self._known_users) > KNOWN_USERS_MAX_SIZE:
+            self._known_users.popitem(last=False)
+
+    def forget_user(self, phone_num: str) -> None:
+        """Stop trusting a phone number's cached registration (e.g., when the backend no longer seems to have it).
+
+        Args:
+            phone_num (str): The user's WhatsApp phone number.
+        """
+        self._known_users.pop(phone_num, None)
+
     @abstractmethod
     async def register_user(self, phone_num: str, preferred_language: str) -> dict:
         """Register a new WhatsApp user with the Ansari backend.
@@ -105,3 +150,10 @@ class AnsariClientBase(ABC):
             MessageProcessingError: If message processing fails.
         """
         pass
+
+    async def close(self) -> None:
+        """Release any resources (e.g., pooled HTTP connections) held by the client.
+
+        Implementations without such resources can rely on this no-op default.
+        """
+        pass
@@ -92,6 +92,7 @@ class AnsariClientMock(AnsariClientBase):
 
     def __init__(self):
         """Initialize the mock Ansari API client with in-memory state."""
+        super().__init__()
         self.settings = get_settings()
         # In-memory state for mock data
         self._users = {}  # phone_num -> user_data
@@ -1,7 +1,12 @@
 # Real API Client for ansari-whatsapp
 """Real client implementation for interacting with the Ansari backend API via HTTP."""
 
+import asyncio
+from functools import wraps
+from typing import Callable
+
 import httpx
+import orjson
 
 from loguru import logger
 
@@ -16,15 +21,86 @@ from ansari_whatsapp.utils.exceptions import (
 )
 from ansari_whatsapp.services.ansari_client_base import AnsariClientBase
 
+# Request bodies are serialized with orjson (instead of httpx's stdlib `json=`), so the content-type is set explicitly
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def coalesce_concurrent_calls(func: Callable) -> Callable:
+    """Decorator that lets concurrent calls with identical arguments share a single backend request.
+
+    When a burst of webhooks arrives (e.g., a user sending several messages in a row),
+    the same idempotent lookup is often requested multiple times within milliseconds.
+    Instead of issuing one request per caller, the first call is awaited by all of them.
+
+    NOTE: Only use this on idempotent (read-only) methods.
+
+    Args:
+        func: The async method to wrap
+
+    Returns:
+        The wrapped method
+    """
+    in_flight: dict[tuple, asyncio.Task] = {}
+
+    @wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        # NOTE: `in_flight` is shared by every instance of the class, and the (cached) client is rebuilt
+        #   whenever the app restarts (e.g., per test module), so keying by instance keeps a request made
+        #   on a closing client from being handed to the callers of its replacement
+        key = (id(self), args, tuple(sorted(kwargs.items())))
+        task = in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(self, *args, **kwargs))
+            in_flight[key] = task
+
+            def on_done(t: asyncio.Task) -> None:
+                in_flight.pop(key, None)
+                # Retrieve the outcome even if every caller was cancelled meanwhile (the shield keeps the task running),
+                #   otherwise asyncio logs "Task exception was never retrieved" when it fails
+                if not t.cancelled():
+                    t.exception()
+
+            task.add_done_callback(on_done)
+        # Shield the shared task so that one cancelled caller doesn't cancel it for the others
+        return await asyncio.shield(task)
+
+    return wrapper
+
 
 class AnsariClientReal(AnsariClientBase):
     """Real client for the Ansari backend API that makes actual HTTP requests."""
 
     def __init__(self):
         """Initialize the Ansari API client."""
+        super().__init__()
         self.settings = get_settings()
         self.base_url = self.settings.BACKEND_SERVER_URL
 
+        # A single client is reused across calls so its connection pool (and the
+        #   TCP/TLS handshakes already made to the backend) survive between requests.
+        # HTTP/2 lets the several sequential RPCs made per WhatsApp message multiplex over one socket,
+        #   and `retries=1` transparently retries requests whose connection attempt failed
+        # NOTE: When a custom transport is passed, httpx ignores the client-level `http2`/`limits`,
+        #   which is why they're configured on the transport itself
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=1,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=30.0),
+            ),
+        )
+
+    async def close(self) -> None:
+        """Close the underlying HTTP client and release its pooled connections."""
+        await self._client.aclose()
+
+    async def __aenter__(self) -> "AnsariClientReal":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
     async def register_user(self, phone_num: str, preferred_language: str) -> dict:
         """
         Register a new WhatsApp user with the Ansari backend.
@@ -40,16 +116,16 @@ class AnsariClientReal(AnsariClientBase):
             UserRegistrationError: If the registration fails.
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/whatsapp/v2/users/register",
-                    json={
-                        "phone_num": phone_num,
-                        "preferred_language": preferred_language,
-                    },
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self._client.post(
+                "/whatsapp/v2/users/register",
+                content=orjson.dumps({
+                    "phone_num": phone_num,
+                    "preferred_language": preferred_language,
+                }),
+                headers=_JSON_HEADERS,
+            )
+            response.raise_for_status()
+            return orjson.loads(response.content)
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error registering user {phone_num}: {e.response.status_code}")
             raise UserRegistrationError(f"Failed to register user: HTTP {e.response.status_code}") from e
@@ -57,6 +133,7 @@ class AnsariClientReal(AnsariClientBase):
             logger.error(f"Network error registering user {phone_num}: {e}")
             raise UserRegistrationError("Network error during registration") from e
 
+    @coalesce_concurrent_calls
     async def check_user_exists(self, phone_num: str) -> bool:
         """
         Check if a WhatsApp user exists in the Ansari backend.
@@ -71,13 +148,12 @@ class AnsariClientReal(AnsariClientBase):
             UserExistsCheckError: If the check fails.
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/whatsapp/v2/users/exists",
-                    params={"phone_num": phone_num},
-                )
-                response.raise_for_status()
-                return response.json().get("exists", False)
+            response = await self._client.get(
+                "/whatsapp/v2/users/exists",
+                params={"phone_num": phone_num},
+            )
+            response.raise_for_status()
+            return orjson.loads(response.content).get("exists", False)
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error checking if user exists {phone_num}: {e.response.status_code}")
             raise UserExistsCheckError(f"Failed to check user existence: HTTP {e.response.status_code}") from e
@@ -100,13 +176,13 @@ class AnsariClientReal(AnsariClientBase):
             ThreadCreationError: If thread creation fails.
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/whatsapp/v2/threads",
-                    json={"phone_num": phone_num, "title": title},
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self._client.post(
+                "/whatsapp/v2/threads",
+                content=orjson.dumps({"phone_num": phone_num, "title": title}),
+                headers=_JSON_HEADERS,
+            )
+            response.raise_for_status()
+            return orjson.loads(response.content)
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error creating thread for {phone_num}: {e.response.status_code}")
             raise ThreadCreationError(f"Failed to create thread: HTTP {e.response.status_code}") from e
@@ -129,13 +205,12 @@ class AnsariClientReal(AnsariClientBase):
             ThreadHistoryError: If retrieving thread history fails.
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/whatsapp/v2/threads/{thread_id}/history",
-                    params={"phone_num": phone_num},
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self._client.get(
+                f"/whatsapp/v2/threads/{thread_id}/history",
+                params={"phone_num": phone_num},
+            )
+            response.raise_for_status()
+            return orjson.loads(response.content)
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error getting thread history for {phone_num}: {e.response.status_code}")
             raise ThreadHistoryError(f"Failed to get thread history: HTTP {e.response.status_code}") from e
@@ -143,6 +218,7 @@ class AnsariClientReal(AnsariClientBase):
             logger.error(f"Network error getting thread history for {phone_num}: {e}")
             raise ThreadHistoryError("Network error during thread history retrieval") from e
 
+    @coalesce_concurrent_calls
     async def get_last_thread_info(self, phone_num: str) -> dict:
         """
         Get information about the last active thread for a WhatsApp user.
@@ -157,13 +233,12 @@ class AnsariClientReal(AnsariClientBase):
             ThreadInfoError: If retrieving thread info fails.
         """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/whatsapp/v2/threads/last",
-                    params={"phone_num": phone_num},
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self._client.get(
+                "/whatsapp/v2/threads/last",
+                params={"phone_num": phone_num},
+            )
+            response.raise_for_status()
+            return orjson.loads(response.content)
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error getting last thread info for {phone_num}: {e.response.status_code}")
             raise ThreadInfoError(f"Failed to get last thread info: HTTP {e.response.status_code}") from e
@@ -188,51 +263,55 @@ class AnsariClientReal(AnsariClientBase):
             MessageProcessingError: If message processing fails.
         """
         try:
-            async with httpx.AsyncClient() as client:
-                url = f"{self.base_url}/whatsapp/v2/messages/process"
-                data = {
-                    "phone_num": phone_num,
-                    "thread_id": thread_id,
-                    "message": message,
-                }
-
-                # Use stream=True to receive the response as a stream
-                async with client.stream("POST", url, json=data, timeout=60.0) as response:
-                    if response.status_code != 200:
-                        error_detail = await response.aread()
-                        logger.error(f"Error from backend API: {error_detail}")
-                        raise MessageProcessingError(f"Backend returned HTTP {response.status_code}: {error_detail}")
-
-                    # Accumulate the full response as we receive chunks
-                    full_response = ""
-                    async for chunk in response.aiter_text():
-                        # Each chunk is a token from the streaming response
-                        if chunk:
-                            full_response += chunk
-
-                    if not full_response:
-                        logger.warning("Received empty response from backend")
-                        return ""
-
-                    # # TEMPORARY: Save response to file for testing/mocking purposes
-                    # # Comment out this block when you don't want to update the sample response file
-                    # try:
-                    #     from pathlib import Path
-
-                    #     # Create the directory if it doesn't exist
-                    #     sample_dir = Path.cwd() / "docs" / "sample_backend_responses"
-                    #     sample_dir.mkdir(parents=True, exist_ok=True)
-
-                    #     # Write the response to the file
-                    #     sample_file = sample_dir / "sample_ansari_llm_response.txt"
-                    #     with open(sample_file, "w", encoding="utf-8") as f:
-                    #         f.write(full_response)
-                    #     logger.info(f"Saved backend response to {sample_file}")
-                    # except Exception as e:
-                    #     logger.warning(f"Failed to save sample response: {e}")
-                    # # END TEMPORARY CODE
-
-                    return full_response
+            url = "/whatsapp/v2/messages/process"
+            data = {
+                "phone_num": phone_num,
+                "thread_id": thread_id,
+                "message": message,
+            }
+
+            # Use stream=True to receive the response as a stream
+            async with self._client.stream(
+                "POST", url, content=orjson.dumps(data), headers=_JSON_HEADERS, timeout=60.0
+            ) as response:
+                if response.status_code != 200:
+                    error_detail = await response.aread()
+                    logger.error(f"Error from backend API: {error_detail}")
+                    raise MessageProcessingError(f"Backend returned HTTP {response.status_code}: {error_detail}")
+
+                # Accumulate the raw bytes as we receive chunks and decode once at the end
+                #   (growing a bytearray is amortized O(1), unlike repeated `str +=` copies)
+                buffer = bytearray()
+                async for chunk in response.aiter_bytes():
+                    # Each chunk is (part of) a token from the streaming response
+                    buffer.extend(chunk)
+
+                # NOTE: `errors="replace"` keeps `aiter_text()`'s behavior (i.e., an invalid byte doesn't drop the whole reply)
+                full_response = buffer.decode(response.encoding or "utf-8", errors="replace")
+
+                if not full_response:
+                    logger.warning("Received empty response from backend")
+                    return ""
+
+                # # TEMPORARY: Save response to file for testing/mocking purposes
+                # # Comment out this block when you don't want to update the sample response file
+                # try:
+                #     from pathlib import Path
+
+                #     # Create the directory if it doesn't exist
+                #     sample_dir = Path.cwd() / "docs" / "sample_backend_responses"
+                #     sample_dir.mkdir(parents=True, exist_ok=True)
+
+                #     # Write the response to the file
+                #     sample_file = sample_dir / "sample_ansari_llm_response.txt"
+                #     with open(sample_file, "w", encoding="utf-8") as f:
+                #         f.write(full_response)
+                #     logger.info(f"Saved backend response to {sample_file}")
+                # except Exception as e:
+                #     logger.warning(f"Failed to save sample response: {e}")
+                # # END TEMPORARY CODE
+
+                return full_response
         except httpx.TimeoutException as e:
             logger.error(f"Timeout processing message for {phone_num}: {e}")
             raise MessageProcessingError("Request timed out while processing message") from e
@@ -17,6 +17,11 @@ class MetaApiServiceReal(MetaApiServiceBase):
         settings = get_settings()
         self.api_url = settings.META_API_URL
         self.access_token = settings.META_ACCESS_TOKEN_FROM_SYS_USER.get_secret_value()
+        # Built once, as the headers are the same for every request
+        self._headers = {
+            "Authorization": f"Bearer {self.access_token}",
+            "Content-Type": "application/json",
+        }
 
     def _get_headers(self) -> dict:
         """Get HTTP headers for Meta API requests.
@@ -24,10 +29,7 @@ class MetaApiServiceReal(MetaApiServiceBase):
         Returns:
             dict: Headers with authorization and content-type
         """
-        return {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json",
-        }
+        return self._headers
 
     async def send_typing_indicator(
         self,
@@ -57,7 +59,7 @@ class MetaApiServiceReal(MetaApiServiceBase):
 
         try:
             async with httpx.AsyncClient() as client:
-                logger.debug(f"Sending typing indicator to {recipient_phone}")
+                logger.debug("Sending typing indicator to {}", recipient_phone)
 
                 response = await client.post(
                     self.api_url,
@@ -103,7 +105,7 @@ class MetaApiServiceReal(MetaApiServiceBase):
 
         try:
             async with httpx.AsyncClient() as client:
-                logger.debug(f"Sending {len(message_parts)} message part(s) to {recipient_phone}")
+                logger.debug("Sending {} message part(s) to {}", len(message_parts), recipient_phone)
 
                 for i, part in enumerate(message_parts, 1):
                     json_data = {
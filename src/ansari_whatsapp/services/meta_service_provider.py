@@ -1,6 +1,8 @@
 # Service Provider for Meta WhatsApp API services
 """Factory function for providing the appropriate Meta API service implementation."""
 
+from functools import lru_cache
+
 from loguru import logger
 
 from ansari_whatsapp.utils.config import get_settings
@@ -9,6 +11,7 @@ from ansari_whatsapp.services.meta_api_service_real import MetaApiServiceReal
 from ansari_whatsapp.services.meta_api_service_mock import MetaApiServiceMock
 
 
+@lru_cache
 def get_meta_api_service() -> MetaApiServiceBase:
     """Factory function that returns the appropriate Meta API service based on configuration.
 
@@ -18,6 +21,9 @@ def get_meta_api_service() -> MetaApiServiceBase:
 
     The choice is controlled by the MOCK_META_API environment variable.
 
+    The instance is cached, so the API URL and access token are resolved once
+    instead of for every incoming message.
+
     Returns:
         MetaApiServiceBase: Either MetaApiServiceReal or MetaApiServiceMock instance
 
@@ -1,6 +1,8 @@
 # Service Provider for ansari-whatsapp
 """Factory function for providing the appropriate Ansari client implementation."""
 
+from functools import lru_cache
+
 from loguru import logger
 
 from ansari_whatsapp.utils.config import get_settings
@@ -9,6 +11,7 @@ from ansari_whatsapp.services.ansari_client_real import AnsariClientReal
 from ansari_whatsapp.services.ansari_client_mock import AnsariClientMock
 
 
+@lru_cache
 def get_ansari_client() -> AnsariClientBase:
     """Factory function that returns the appropriate Ansari client based on configuration.
 
@@ -18,6 +21,9 @@ def get_ansari_client() -> AnsariClientBase:
 
     The choice is controlled by the MOCK_ANSARI_CLIENT environment variable.
 
+    The instance is cached so that every conversation shares the same client
+    (and thus the same pool of keep-alive connections to the backend).
+
     Returns:
         AnsariClientBase: Either AnsariClientReal or AnsariClientMock instance
 
@@ -4,6 +4,7 @@
 import asyncio
 import time
 from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
 
 from loguru import logger
 
@@ -61,6 +62,8 @@ class WhatsAppConversationManager:
         self.meta_api_service = get_meta_api_service()
         self.typing_indicator_task = None
         self.first_indicator_time = None
+        # Whether the user's registration was assumed from the client's cache (i.e., not checked with the backend)
+        self.user_registration_cached = False
 
     async def send_typing_indicator_then_start_loop(self) -> None:
         """Send a typing indicator and start a loop to periodically send more while processing."""
@@ -94,7 +97,7 @@ class WhatsAppConversationManager:
                     break
 
                 # If we're still processing the message, send another typing indicator
-                logger.debug(f"Sending follow-up typing indicator after {elapsed_time:.1f}s")
+                logger.debug("Sending follow-up typing indicator after {:.1f}s", elapsed_time)
                 await self._send_whatsapp_typing_indicator()
 
         except asyncio.CancelledError:
@@ -113,11 +116,18 @@ class WhatsAppConversationManager:
             logger.error("Cannot check and register user: user_phone_num is not set")
             return False
 
+        # Skip the backend round trip for users we've already seen registered
+        if self.ansari_client.is_known_user(self.user_phone_num):
+            self.user_registration_cached = True
+            return True
+        self.user_registration_cached = False
+
         try:
             # Check if the user's phone number exists
             user_exists = await self.ansari_client.check_user_exists(self.user_phone_num)
 
             if user_exists:
+                self.ansari_client.remember_user(self.user_phone_num)
                 return True
 
             # Else, register the user with the detected language
@@ -129,6 +139,7 @@ class WhatsAppConversationManager:
                 user_lang = "en"
 
             result = await self.ansari_client.register_user(self.user_phone_num, user_lang)
+            self.ansari_client.remember_user(self.user_phone_num)
 
             logger.info(f"Registered new whatsapp user (lang: {user_lang}): {self.user_phone_num}")
             return True
@@ -146,6 +157,29 @@ class WhatsAppConversationManager:
             logger.exception(f"Unexpected error checking/registering user: {e}")
             return False
 
+    async def handle_incoming_message(self) -> None:
+        """Register the user if needed, then route the incoming message to its handler.
+
+        This is meant to run as a background task, so that the webhook can be
+        acknowledged to Meta without waiting on any backend round trip.
+        """
+        # Check if the user's phone number is stored and register if not
+        # Returns false if user's not found and their registration fails
+        user_found = await self.check_and_register_user()
+        if not user_found:
+            await self.send_whatsapp_message(
+                "Sorry, we couldn't register you to our database. Please try again later."
+            )
+            return
+
+        # Check if the incoming message is a media type other than text
+        if self.incoming_msg_type != "text":
+            await self.handle_unsupported_message()
+            return
+
+        # Process text messages sent by the WhatsApp user
+        await self.handle_text_message()
+
     async def _send_whatsapp_typing_indicator(self) -> None:
         """Send a typing indicator to the WhatsApp recipient."""
         if not self.user_phone_num or not self.message_id:
@@ -199,15 +233,19 @@ class WhatsAppConversationManager:
 
         try:
             incoming_txt_msg = self.incoming_msg_body["body"]
-            logger.debug(f"Whatsapp user said: {incoming_txt_msg}")
+            logger.debug("Whatsapp user said: {}", incoming_txt_msg)
 
             # Get details of the thread that the user last interacted with
             try:
-                last_thread_info = await self.ansari_client.get_last_thread_info(self.user_phone_num)
+                last_thread_info = await self._call_with_registration_retry(
+                    self.ansari_client.get_last_thread_info, ThreadInfoError
+                )
                 thread_id = last_thread_info.get("thread_id")
                 last_msg_time = last_thread_info.get("last_message_time")
             except ThreadInfoError as e:
                 logger.error(f"Failed to get thread info: {e}")
+                # The user may no longer exist in the backend, so re-check their registration next time
+                self.ansari_client.forget_user(self.user_phone_num)
                 await self.send_whatsapp_message(
                     "Sorry, we're having trouble accessing your chat history. Please try again later."
                 )
@@ -218,7 +256,7 @@ class WhatsAppConversationManager:
 
             # Calculate the time passed since the last message
             passed_time, passed_time_logging = calculate_time_passed(last_msg_time)
-            logger.debug(f"Time passed since user's last whatsapp message: {passed_time_logging}")
+            logger.debug("Time passed since user's last whatsapp message: {}", passed_time_logging)
 
             # Get the allowed retention time
             allowed_time = get_retention_time_seconds()
@@ -226,14 +264,20 @@ class WhatsAppConversationManager:
             # Create a new thread if no threads have been previously created,
             # or the last message has passed the allowed retention time
             if thread_id is None or passed_time > allowed_time:
-                first_few_words = " ".join(incoming_txt_msg.split()[:6])
+                # NOTE: `maxsplit` stops splitting after the words we need (the leftover tail is sliced off),
+                #   so long (e.g., pasted) messages aren't fully split just to build a title
+                first_few_words = " ".join(incoming_txt_msg.split(maxsplit=6)[:6])
 
                 try:
-                    result = await self.ansari_client.create_thread(self.user_phone_num, first_few_words)
+                    result = await self._call_with_registration_retry(
+                        self.ansari_client.create_thread, ThreadCreationError, first_few_words
+                    )
                     thread_id = result.get("thread_id")
                     logger.info("Created a new thread for the whatsapp user, " + "as the allowed retention time has passed.")
                 except ThreadCreationError as e:
                     logger.error(f"Failed to create thread: {e}")
+                    # The user may no longer exist in the backend, so re-check their registration next time
+                    self.ansari_client.forget_user(self.user_phone_num)
                     await self.send_whatsapp_message(
                         "An unexpected error occurred while creating a new chat session. Please try again later."
                     )
@@ -269,7 +313,7 @@ class WhatsAppConversationManager:
                 return
 
             # Convert conventional markdown syntax to WhatsApp's markdown syntax
-            logger.debug(f"Response before markdown conversion: \n\n{response}")
+            logger.debug("Response before markdown conversion: \n\n{}", response)
             response = format_for_whatsapp(response)
 
             if not response:
@@ -291,6 +335,39 @@ class WhatsAppConversationManager:
             if self.typing_indicator_task and not self.typing_indicator_task.done():
                 self.typing_indicator_task.cancel()
 
+    async def _call_with_registration_retry(
+        self,
+        client_method: Callable[..., Awaitable[Any]],
+        error_class: type[Exception],
+        *args: Any,
+    ) -> Any:
+        """Call an Ansari client method for the user, re-registering them once if their cached registration is stale.
+
+        Args:
+            client_method (Callable): The Ansari client method to call (with the user's phone number, then `args`).
+            error_class (type[Exception]): The exception the method raises when the backend call fails.
+            *args: The remaining arguments of the method.
+
+        Returns:
+            Any: The result of the method.
+
+        Raises:
+            error_class: If the call failed (even after re-registering the user).
+        """
+        try:
+            return await client_method(self.user_phone_num, *args)
+        except error_class as e:
+            if not self.user_registration_cached:
+                raise
+
+            # The backend may no longer have this (cached) user, so forget them,
+            #   re-check/register them and retry once before reporting the error
+            logger.warning(f"{client_method.__name__} failed for a cached user, re-checking their registration: {e}")
+            self.ansari_client.forget_user(self.user_phone_num)
+            if not await self.check_and_register_user():
+                raise
+            return await client_method(self.user_phone_num, *args)
+
     async def handle_unsupported_message(self) -> None:
         """Handle an incoming unsupported message by sending an appropriate response."""
         if not self.user_phone_num or not self.incoming_msg_type:
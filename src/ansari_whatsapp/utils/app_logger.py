@@ -3,87 +3,141 @@
 
 import os
 import sys
+import threading
 from typing import Any, Callable
 
 from loguru import logger
 
 from ansari_whatsapp.utils.config import get_settings
 
-# Create logs directory if it doesn't exist
-os.makedirs("logs", exist_ok=True)
-
-# Track if logger has been configured globally to avoid duplicate handlers
-_logger_configured = False
+# Log formats (static strings, which loguru parses/colorizes only once when the handler is added,
+#   rather than building the line per record)
+_CONSOLE_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
+    "<level>{level: <4}</level> | "
+    "<cyan>{file}</cyan>:<cyan>{line}</cyan> "
+    "<blue>[{function}()]</blue> | "
+    "<level>{message}</level>"
+)
+_FILE_FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {file}:{line} [{function}()] | {message}"
+
+# IDs of the handlers added by `configure_logger()`, which also tracks if the logger has been configured globally
+#   (each extra handler means every log record gets formatted and written once more, so they mustn't stack up)
+_handler_ids: list[int] = []
+_configure_lock = threading.Lock()
 
 logger.remove()  # Remove default handler to prevent duplicate logs
 
+
+# Source file path -> whether it's a test file (filled lazily, as log records come from a small, repeating set of files)
+_is_test_file_by_path: dict[str, bool] = {}
+
+
+def _is_test_file(path: str) -> bool:
+    """Check whether a source file is a test file (i.e., in a "tests" folder or named "test_*").
+
+    The result is computed once per path, then looked up in `_is_test_file_by_path`.
+
+    Args:
+        path (str): The path of the file that emitted the log record.
+    """
+    is_test = _is_test_file_by_path.get(path)
+    if is_test is None:
+        is_test = _is_test_file_by_path[path] = "tests" in path or "test_" in os.path.basename(path)
+    return is_test
+
+
 def configure_logger():
     """Configure the global logger with handlers for console and file output.
 
     This should be called once at application startup (in main.py's if __name__ == "__main__" block).
     After configuration, use `from loguru import logger` directly in other modules.
-    """
-    global _logger_configured
 
-    # Only configure handlers once globally
-    if _logger_configured:
-        return
-
-    _logger_configured = True
-
-    # Get settings
-    settings = get_settings()
-
-    # Filter for test files only (when LOG_TEST_FILES_ONLY is True)
-    def log_filter(record):
-        """Filter logs based on test file settings.
-
-        Args:
-            record: The log record being processed.
-        """
-        # If LOG_TEST_FILES_ONLY is True, only allow logs from files in "tests" folder or files starting with "test_"
-        if settings.LOG_TEST_FILES_ONLY and not (
-            "tests" in record["file"].path or "test_" in record["file"].name
-        ):
-            return False
-
-        return True
-
-    # Add console handler for terminal output
-    logger.add(
-        sys.stderr,
-        format=(
-            "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
-            "<level>{level: <4}</level> | "
-            "<cyan>{file}</cyan>:<cyan>{line}</cyan> "
-            "<blue>[{function}()]</blue> | "
-            "<level>{message}</level>"
-        ),
-        level=settings.LOGGING_LEVEL.upper(),
-        enqueue=True,
-        colorize=True,
-        backtrace=False,
-        diagnose=False,
-        filter=log_filter,
-        catch=False,
-    )
-
-    # Write logs to all_logs.log file (IF we're running locally)
-    if settings.DEPLOYMENT_TYPE == "local":
-        log_dir = os.path.join(os.getcwd(), "logs")
-        os.makedirs(log_dir, exist_ok=True)
-        all_logs_file = os.path.join(log_dir, "all_logs.log")
-        logger.add(
-            all_logs_file,
-            format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {file}:{line} [{function}()] | {message}",
-            level=settings.LOGGING_LEVEL.upper(),
-            enqueue=True,
-            backtrace=False,
-            diagnose=False,
-            filter=log_filter,
-            rotation="10 MB",
-            catch=False,
-        )
+    NOTE: On hot paths (i.e., per request/message), prefer passing values as arguments
+    (e.g., `logger.debug("Message from {}", phone_num)`) instead of f-strings, as loguru then
+    only formats the message if its level is actually enabled.
+    """
+    # NOTE: The lock makes the check-then-install step atomic (e.g., if two threads import the app at once),
+    #   so at most one set of handlers is ever installed
+    with _configure_lock:
+        # Only configure handlers once globally
+        if _handler_ids:
+            # NOTE: This is expected (e.g., `main.py` is imported as both `__mp_main__` and its module name
+            #   when uvicorn spawns a worker), so it's only logged at DEBUG level
+            logger.debug("configure_logger() was called more than once; keeping the already installed handlers")
+            return
+
+        # Get settings
+        settings = get_settings()
+
+        # Resolve the configured level name to its number once, and share it between all handlers
+        level_no = logger.level(settings.LOGGING_LEVEL.upper()).no
+
+        # Filter for test files only (when LOG_TEST_FILES_ONLY is True)
+        def test_file_filter(record):
+            """Filter logs based on test file settings.
+
+            Args:
+                record: The log record being processed.
+            """
+            # Only allow logs from files in "tests" folder or files starting with "test_"
+            return _is_test_file(record["file"].path)
+
+        # When LOG_TEST_FILES_ONLY is False, no filter is attached at all (i.e., no per-record filtering work)
+        log_filter = test_file_filter if settings.LOG_TEST_FILES_ONLY else None
+
+        if settings.DEPLOYMENT_TYPE == "local":
+            # Add console handler for terminal output (colorized, as a developer reads it)
+            _handler_ids.append(logger.add(
+                sys.stderr,
+                format=_CONSOLE_FORMAT,
+                level=level_no,
+                enqueue=True,
+                colorize=True,
+                backtrace=False,
+                diagnose=False,
+                filter=log_filter,
+                catch=False,
+            ))
+        else:
+            # In deployed environments, the output is read by the platform's log collector (not a terminal),
+            #   so emit one JSON object per record instead of (discarded) color markup
+            _handler_ids.append(logger.add(
+                sys.stdout,
+                serialize=True,
+                level=level_no,
+                enqueue=True,
+                colorize=False,
+                backtrace=False,
+                diagnose=False,
+                filter=log_filter,
+                catch=False,
+            ))
+
+        # Write logs to all_logs.log file (IF we're running locally, and file logging isn't turned off)
+        if settings.DEPLOYMENT_TYPE == "local" and settings.LOG_TO_FILE:
+            log_dir = os.path.join(os.getcwd(), "logs")
+            # NOTE: This is the only place the logs directory is created (i.e., once, and only when it's needed)
+            os.makedirs(log_dir, exist_ok=True)
+            all_logs_file = os.path.join(log_dir, "all_logs.log")
+            _handler_ids.append(logger.add(
+                all_logs_file,
+                format=_FILE_FORMAT,
+                level=level_no,
+                enqueue=True,
+                backtrace=False,
+                diagnose=False,
+                filter=log_filter,
+                rotation="10 MB",
+                # Keep only the most recent rotated files, so disk usage stays bounded in long-running processes
+                retention=5,
+                # Don't open the file until the first record is actually written to it
+                delay=True,
+                # NOTE: The file is deliberately kept line-buffered (loguru's default, i.e., no `buffering=`),
+                #   so `tail -f` shows records as they're logged and a crash doesn't lose the last (buffered) ones.
+                #   `enqueue=True` already keeps the actual writes off the request path
+                catch=False,
+            ))
 
 # Error handler factory that creates context-specific error handlers
 # NOTE: This function is deprecated in favor of explicit try-except blocks with custom exceptions.
@@ -100,10 +154,12 @@ def make_error_handler(context: str) -> Callable:
         callable: An error handler function that can be used with logger.catch
     """
 
+    # Built once per handler (i.e., not per caught exception)
+    message_prefix = f"{context}: "
+
     def error_handler(exception):
-        exception_msg = str(exception)
         # NOTE: Loguru's exception method automatically includes the stack trace after the message
-        logger.exception(f"{context}: {exception_msg}")
+        logger.exception("{}{}", message_prefix, exception)
         return
 
     return error_handler
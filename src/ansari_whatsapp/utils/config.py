@@ -1,12 +1,32 @@
 # Configuration for ansari-whatsapp
 """Configuration and settings for the WhatsApp service."""
 
-from functools import lru_cache
+from functools import cached_property, lru_cache
 
 from pydantic import SecretStr, Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+# NOTE: The ORIGINS validators below delegate to these cached helpers, so that constructing
+#   `WhatsAppSettings` repeatedly (e.g., in tests or subprocesses) with the same inputs doesn't redo the work.
+#   They return tuples, so that the cached values can't be mutated by callers.
+@lru_cache(maxsize=16)
+def _split_origins(raw: str) -> tuple[str, ...]:
+    """Split a comma-separated ORIGINS string into de-duplicated origins (preserving order)."""
+    return tuple(dict.fromkeys(origin.strip() for origin in raw.strip('"').split(",")))
+
+
+@lru_cache(maxsize=16)
+def _with_extra_origins(origins: tuple[str, ...], backend_url: str | None, zrok_origin: str | None) -> tuple[str, ...]:
+    """Append the backend URL, zrok origin (if any), and GitHub Actions' "testserver" origin to `origins`.
+
+    Duplicates are dropped (in a single pass) while preserving order.
+    """
+    extra_origins = (origin for origin in (backend_url, zrok_origin) if origin)
+    # "testserver" makes sure CI/CD of GitHub Actions is allowed in all environments
+    return tuple(dict.fromkeys((*origins, *extra_origins, "testserver")))
+
+
 class WhatsAppSettings(BaseSettings):
     """
     Settings for the WhatsApp service.
@@ -39,6 +59,8 @@ class WhatsAppSettings(BaseSettings):
         env_file_encoding="utf-8",
         case_sensitive=True,
         extra="ignore",
+        # Settings are read-only after startup
+        frozen=True,
     )
 
     ########## ansari-backend's settings ##########
@@ -53,12 +75,14 @@ class WhatsAppSettings(BaseSettings):
     META_WEBHOOK_VERIFY_TOKEN: SecretStr
     META_WEBHOOK_ZROK_SHARE_TOKEN: SecretStr
 
-    @property
+    @cached_property
     def META_API_URL(self) -> str:
         """
         Returns the Meta Graph API URL for sending WhatsApp messages.
 
         Format: https://graph.facebook.com/{version}/{phone-number-id}/messages
+
+        NOTE: Computed on first access and then cached on the (singleton) settings instance.
         """
         return f"https://graph.facebook.com/{self.META_API_VERSION}/{self.META_BUSINESS_PHONE_NUMBER_ID.get_secret_value()}/messages"
 
@@ -86,6 +110,8 @@ class WhatsAppSettings(BaseSettings):
     WHATSAPP_UNDER_MAINTENANCE: bool = False
     WHATSAPP_CHAT_RETENTION_HOURS: int
     WHATSAPP_MESSAGE_AGE_THRESHOLD_SECONDS: int
+    # Must be positive (i.e., 0 would make every background task wait forever)
+    MAX_CONCURRENT_BG_TASKS: int = Field(default=64, gt=0)
 
     # Test/Development settings
     WHATSAPP_DEV_PHONE_NUM: SecretStr = SecretStr("201234567899")
@@ -94,6 +120,7 @@ class WhatsAppSettings(BaseSettings):
     # Logging settings
     LOGGING_LEVEL: str = "DEBUG"
     LOG_TEST_FILES_ONLY: bool = False
+    LOG_TO_FILE: bool = True
 
     # Service Provider settings
     MOCK_ANSARI_CLIENT: bool = False
@@ -105,14 +132,13 @@ class WhatsAppSettings(BaseSettings):
     def parse_origins(cls, v):
         """Parse ORIGINS from a comma-separated string or list."""
         if isinstance(v, str):
-            origins = [origin.strip() for origin in v.strip('"').split(",")]
+            return list(_split_origins(v))
         elif isinstance(v, list):
-            origins = v
-        else:
-            raise ValueError(
-                f"Invalid ORIGINS format: {v}. Expected a comma-separated string or a list.",
-            )
-        return origins
+            # Remove duplicates while preserving order
+            return list(dict.fromkeys(v))
+        raise ValueError(
+            f"Invalid ORIGINS format: {v}. Expected a comma-separated string or a list.",
+        )
 
     @field_validator("ORIGINS", mode="after")
     def add_extra_origins(cls, v, info):
@@ -122,34 +148,35 @@ class WhatsAppSettings(BaseSettings):
         1. In local mode: adds localhost and zrok origins
         2. In all environments: adds GitHub Actions testserver origin
         """
-        origins = v.copy()
-
-        # Add BACKEND_SERVER_URL as an origin if it's not already present
-        backend_url = info.data.get("BACKEND_SERVER_URL")
-        if backend_url and backend_url not in origins:
-            origins.append(backend_url)
-
         # Add local-specific origins when in local mode
+        zrok_origin = None
         if info.data.get("DEPLOYMENT_TYPE") == "local":
             # Add zrok origin (i.e., the webhook (callback url)) that Meta will send messages to)
+            # NOTE: The token is only unwrapped here, as it may be missing (i.e., failed validation)
             zrok_token = info.data.get("META_WEBHOOK_ZROK_SHARE_TOKEN")
-            token_value = zrok_token.get_secret_value()
-            # NOTE: We don't add "https://" as Meta sends request in "host" header, not "origin",
-            #   and so, a value in "host" header means it won't contain the "https://" prefix
-            #   However, even if you don't explicitly remove the "https://" part,
-            #   apparently FastAPI will still correctly recognize the host
-            webhook_origin = f"{token_value}.share.zrok.io"
-            if webhook_origin not in origins:
-                origins.append(webhook_origin)
+            if zrok_token:
+                # NOTE: We don't add "https://" as Meta sends request in "host" header, not "origin",
+                #   and so, a value in "host" header means it won't contain the "https://" prefix
+                #   However, even if you don't explicitly remove the "https://" part,
+                #   apparently FastAPI will still correctly recognize the host
+                zrok_origin = f"{zrok_token.get_secret_value()}.share.zrok.io"
 
-        # Make sure CI/CD of GitHub Actions is allowed in all environments
-        if "testserver" not in origins:
-            origins.append("testserver")
-
-        return origins
+        return list(_with_extra_origins(tuple(v), info.data.get("BACKEND_SERVER_URL"), zrok_origin))
 
 
 @lru_cache
 def get_settings() -> WhatsAppSettings:
     """Get the application settings."""
     return WhatsAppSettings()
+
+
+# Snapshot of immutable settings that are read on every webhook request,
+#   so the hot path can use plain module globals instead of going through the settings model
+_S = get_settings()
+DEPLOYMENT_TYPE = _S.DEPLOYMENT_TYPE
+UNDER_MAINTENANCE = _S.WHATSAPP_UNDER_MAINTENANCE
+VERIFY_TOKEN_BYTES = _S.META_WEBHOOK_VERIFY_TOKEN.get_secret_value().encode()
+BUSINESS_PHONE_NUMBER_ID = _S.META_BUSINESS_PHONE_NUMBER_ID.get_secret_value()
+ALWAYS_RETURN_OK_TO_META = _S.ALWAYS_RETURN_OK_TO_META
+MESSAGE_AGE_THRESHOLD_SECONDS = _S.WHATSAPP_MESSAGE_AGE_THRESHOLD_SECONDS
+RETENTION_TIME_SECONDS = _S.WHATSAPP_CHAT_RETENTION_HOURS * 60 * 60
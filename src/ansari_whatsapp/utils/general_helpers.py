@@ -21,7 +21,7 @@ class CORSMiddlewareWithLogging(CORSMiddleware):
         origin = request.headers.get("origin")
         host = request.headers.get("host")
         if "zrok" not in host:
-            logger.debug(f"Incoming CORS Request: origin={origin}, host={host}")
+            logger.debug("Incoming CORS Request: origin={}, host={}", origin, host)
         origin = origin if origin else host
 
         # Pre-check for CORS issues
@@ -4,6 +4,9 @@
 import re
 from typing import Literal
 
+# Runs of Arabic-script characters (i.e., the Arabic, Arabic Supplement/Extended-A and Presentation Forms blocks)
+_RTL_CHARS_PATTERN = re.compile(r"[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]+")
+
 
 def get_language_from_text(text: str) -> str:
     """
@@ -34,10 +37,13 @@ def get_language_direction_from_text(text: str) -> Literal["ltr", "rtl", "unknow
     Returns:
         Literal["ltr", "rtl", "unknown"]: The detected text direction.
     """
+    # Fast path: pure ASCII text (e.g., most English replies) can't contain any rtl characters,
+    #   so the regex scan is skipped entirely
+    if text.isascii():
+        return "ltr"
+
     # If the text has more rtl characters than ltr, it's considered rtl
-    rtl_chars = re.findall(
-        r"[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]+", text
-    )
+    rtl_chars = _RTL_CHARS_PATTERN.findall(text)
     rtl_count = sum(len(match) for match in rtl_chars)
 
     # If more than 30% of characters are RTL, consider it RTL
@@ -0,0 +1,46 @@
+# Message De-duplication Utilities
+"""Utilities for detecting webhook messages that Meta has already delivered (i.e., retries)."""
+
+import time
+from collections import OrderedDict
+
+
+# How long (in seconds) a message ID is remembered, and how many IDs are remembered at most
+SEEN_MESSAGE_TTL_SECONDS = 600
+SEEN_MESSAGE_MAX_IDS = 10_000
+
+# message_id -> monotonic time at which it was first seen (oldest entries first)
+_seen_message_ids: OrderedDict[str, float] = OrderedDict()
+
+
+def is_duplicate_message(message_id: str | None) -> bool:
+    """Check whether a message ID was already seen recently, remembering it if not.
+
+    Meta re-delivers the same webhook when it doesn't receive a timely 200 response,
+    so the (unique) `wamid.` message ID is used to process each message only once.
+
+    NOTE: No lock is needed, as this is only called from the event loop and never awaits.
+
+    Args:
+        message_id (str | None): The ID of the incoming WhatsApp message.
+
+    Returns:
+        bool: True if the message ID was seen within the last `SEEN_MESSAGE_TTL_SECONDS`, False otherwise.
+    """
+    if not message_id:
+        return False
+
+    now = time.monotonic()
+
+    # Entries are inserted in chronological order, so expired ones are always at the front
+    while _seen_message_ids and next(iter(_seen_message_ids.values())) < now - SEEN_MESSAGE_TTL_SECONDS:
+        _seen_message_ids.popitem(last=False)
+
+    if message_id in _seen_message_ids:
+        return True
+
+    _seen_message_ids[message_id] = now
+    if len(_seen_message_ids) > SEEN_MESSAGE_MAX_IDS:
+        _seen_message_ids.popitem(last=False)
+
+    return False
@@ -5,7 +5,7 @@ from datetime import datetime, timezone
 
 from loguru import logger
 
-from ansari_whatsapp.utils.config import get_settings
+from ansari_whatsapp.utils.config import MESSAGE_AGE_THRESHOLD_SECONDS, RETENTION_TIME_SECONDS
 
 
 def format_time_delta(seconds: float) -> str:
@@ -60,9 +60,7 @@ def get_retention_time_seconds() -> int:
     Returns:
         int: The retention time in seconds.
     """
-    settings = get_settings()
-    retention_hours = settings.WHATSAPP_CHAT_RETENTION_HOURS
-    return retention_hours * 60 * 60
+    return RETENTION_TIME_SECONDS
 
 
 def is_message_too_old(message_unix_time: int | None) -> bool:
@@ -77,8 +75,7 @@ def is_message_too_old(message_unix_time: int | None) -> bool:
     Returns:
         bool: True if the message is older than the threshold, False otherwise
     """
-    settings = get_settings()
-    too_old_threshold = settings.WHATSAPP_MESSAGE_AGE_THRESHOLD_SECONDS
+    too_old_threshold = MESSAGE_AGE_THRESHOLD_SECONDS
 
     # If there's no timestamp, message can't be verified as too old
     if not message_unix_time:
@@ -94,8 +91,8 @@ def is_message_too_old(message_unix_time: int | None) -> bool:
         time_diff = (current_time - msg_time).total_seconds()
 
         # Log the message age for debugging
-        age_logging = format_time_delta(time_diff)
-        logger.debug(f"Message age: {age_logging}")
+        # NOTE: `lazy=True` means format_time_delta() only runs if DEBUG logs are actually emitted
+        logger.opt(lazy=True).debug("Message age: {}", lambda: format_time_delta(time_diff))
 
         # Return True if the message is older than the threshold
         return time_diff > too_old_threshold
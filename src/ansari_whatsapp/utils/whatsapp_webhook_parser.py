@@ -3,9 +3,7 @@
 
 from loguru import logger
 
-from ansari_whatsapp.utils.config import get_settings
-
-settings = get_settings()
+from ansari_whatsapp.utils.config import BUSINESS_PHONE_NUMBER_ID
 
 
 async def parse_webhook_payload(
@@ -47,8 +45,7 @@ async def parse_webhook_payload(
         raise Exception(error_msg)
 
     incoming_phone_number_id = value["metadata"]["phone_number_id"]
-    configured_phone_number_id = settings.META_BUSINESS_PHONE_NUMBER_ID.get_secret_value()
-    is_target_business_number = incoming_phone_number_id == configured_phone_number_id
+    is_target_business_number = incoming_phone_number_id == BUSINESS_PHONE_NUMBER_ID
 
     if not is_target_business_number:
         return None, is_target_business_number, None, None, None, None, None
@@ -77,7 +74,8 @@ async def parse_webhook_payload(
     incoming_msg_type = incoming_msg["type"] if incoming_msg["type"] in incoming_msg.keys() else "errors"
     incoming_msg_body = incoming_msg[incoming_msg_type]
 
-    logger.info(f"Received a supported whatsapp message from {user_whatsapp_number}: {incoming_msg_body}")
+    # NOTE: Passed as arguments, so the message body dict is only stringified if INFO logs are enabled
+    logger.info("Received a supported whatsapp message from {}: {}", user_whatsapp_number, incoming_msg_body)
 
     return (
         is_status,
@@ -5,9 +5,9 @@ This module provides common test functionality following
 the backend test patterns (pytest + TestClient + fixtures).
 """
 
-import json
+import time
+import orjson
 from typing import Any, Dict
-from datetime import datetime
 
 
 def log_test_result(test_name: str, success: bool, message: str, response_data: Any = None) -> Dict[str, Any]:
@@ -27,7 +27,7 @@ def log_test_result(test_name: str, success: bool, message: str, response_data:
         "test_name": test_name,
         "success": success,
         "message": message,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
     }
 
     if response_data is not None:
@@ -46,7 +46,7 @@ def format_payload_for_logging(payload: Dict[str, Any]) -> str:
     Returns:
         JSON string
     """
-    return json.dumps(payload, indent=2)
+    return orjson.dumps(payload, option=orjson.OPT_INDENT_2).decode()
 
 
 def format_params_for_logging(params: Dict[str, Any]) -> str:
@@ -59,4 +59,4 @@ def format_params_for_logging(params: Dict[str, Any]) -> str:
     Returns:
         JSON string
     """
-    return json.dumps(params, indent=2)
\ No newline at end of file
+    return orjson.dumps(params, option=orjson.OPT_INDENT_2).decode()
\ No newline at end of file
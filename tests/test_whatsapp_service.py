@@ -27,11 +27,12 @@ Required Environment Variables:
 Security: All sensitive data is loaded from environment variables and masked in logs.
 """
 
-import json
 import os
 import pytest
 import time
 import httpx
+import orjson
+from functools import lru_cache, wraps
 from typing import Any
 
 from fastapi.testclient import TestClient
@@ -40,7 +41,9 @@ from fastapi.testclient import TestClient
 from loguru import logger
 
 from ansari_whatsapp.app.main import app
-from ansari_whatsapp.utils.config import get_settings
+from ansari_whatsapp.services.meta_service_provider import get_meta_api_service
+from ansari_whatsapp.services.service_provider import get_ansari_client
+from ansari_whatsapp.utils.config import BUSINESS_PHONE_NUMBER_ID, get_settings
 from .test_utils import (
     log_test_result,
     format_payload_for_logging,
@@ -48,9 +51,18 @@ from .test_utils import (
 )
 
 
+# pytest cache entry (i.e., stored under `.pytest_cache/`) remembering that the backend was recently reachable,
+#   so repeated runs during development don't re-probe it every session
+BACKEND_AVAILABILITY_CACHE_KEY = "ansari_whatsapp/backend_availability"
+BACKEND_AVAILABILITY_CACHE_TTL_SECONDS = 60
+
+
+@lru_cache(maxsize=1)
 def check_backend_availability() -> bool:
     """Check if the ansari-backend service is running and accessible.
 
+    Memoized, so the backend is probed at most once per test process (i.e., even if more fixtures/modules call this).
+
     Returns:
         bool: True if backend is available, False otherwise
     """
@@ -59,7 +71,8 @@ def check_backend_availability() -> bool:
 
     try:
         logger.info(f"Checking backend availability at {backend_url}")
-        response = httpx.get(f"{backend_url}/", timeout=3.0)
+        # A short connect timeout makes an unreachable backend fail fast, while a responsive one still gets 3s to answer
+        response = httpx.get(f"{backend_url}/", timeout=httpx.Timeout(3.0, connect=1.0))
         is_available = response.status_code == 200
         logger.info(f"Backend availability: {'AVAILABLE' if is_available else 'UNAVAILABLE'} (status: {response.status_code})")
         return is_available
@@ -72,7 +85,7 @@ def check_backend_availability() -> bool:
 
 
 @pytest.fixture(scope="module", autouse=True)
-def configure_mock_mode():
+def configure_mock_mode(pytestconfig, settings):
     """Configure mock mode based on backend availability before running tests.
 
     This fixture runs before all tests and checks the MOCK_ANSARI_CLIENT setting.
@@ -82,11 +95,12 @@ def configure_mock_mode():
     If backend is not available and mock mode is disabled, tests will terminate
     with clear instructions on how to fix the issue.
 
+    A successful availability check is remembered (per BACKEND_SERVER_URL) in pytest's cache
+    for `BACKEND_AVAILABILITY_CACHE_TTL_SECONDS`; run pytest with `--cache-clear` to force a fresh check
+    (with `-p no:cacheprovider`, the check is simply done once per test process).
+
     The original value (if any) is restored after tests complete.
     """
-    # Get settings first to check current configuration
-    settings = get_settings()
-
     # Log the current mock mode setting
     if settings.MOCK_ANSARI_CLIENT:
         logger.info("MOCK_ANSARI_CLIENT is True - Tests will use MOCK client")
@@ -95,8 +109,28 @@ def configure_mock_mode():
         logger.info("MOCK_ANSARI_CLIENT is False - Tests will use REAL backend")
         logger.info("Checking backend availability...")
 
-        # Check if backend is available
-        backend_available = check_backend_availability()
+        # Check if backend is available (unless it was found reachable very recently)
+        # NOTE: Only successful checks are cached, so a backend that was just started is never reported as unavailable
+        # NOTE: `pytestconfig.cache` doesn't exist when the cache plugin is disabled (i.e., `-p no:cacheprovider`),
+        #   in which case only the in-process memoization of `check_backend_availability()` applies
+        pytest_cache = getattr(pytestconfig, "cache", None)
+        cached = pytest_cache.get(BACKEND_AVAILABILITY_CACHE_KEY, None) if pytest_cache is not None else None
+        if (
+            cached
+            and cached.get("url") == settings.BACKEND_SERVER_URL
+            and time.time() - cached.get("checked_at", 0) < BACKEND_AVAILABILITY_CACHE_TTL_SECONDS
+        ):
+            logger.info(
+                "Backend was reachable less than {}s ago (cached), skipping the check",
+                BACKEND_AVAILABILITY_CACHE_TTL_SECONDS,
+            )
+            backend_available = True
+        else:
+            backend_available = check_backend_availability()
+            if backend_available and pytest_cache is not None:
+                pytest_cache.set(
+                    BACKEND_AVAILABILITY_CACHE_KEY, {"url": settings.BACKEND_SERVER_URL, "checked_at": time.time()}
+                )
 
         if not backend_available:
             error_message = f"""
@@ -133,16 +167,94 @@ Option 3: Start the backend server
 
     # No teardown actions needed for this fixture
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def settings():
     return get_settings()
 
-# Create TestClient
-client = TestClient(app)
+@pytest.fixture(scope="module")
+def client():
+    """Create one TestClient for the whole module.
+
+    Entering it as a context manager runs the app's lifespan once (i.e., the shared Ansari client
+    is built on startup and its connection pool is closed on shutdown), instead of never running it.
+    """
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def build_webhook_payload(settings, message: dict, phone_number_id: str | None = None) -> dict:
+    """Build a WhatsApp webhook payload (as Meta sends it) around a single incoming message.
+
+    Args:
+        settings: The application settings.
+        message: The message-type-specific fields (e.g., {"type": "text", "text": {"body": "..."}}).
+        phone_number_id: The business phone number ID the webhook is addressed to (defaults to ours).
+
+    Returns:
+        dict: The webhook payload.
+    """
+    if phone_number_id is None:
+        phone_number_id = settings.META_BUSINESS_PHONE_NUMBER_ID.get_secret_value()
+
+    return {
+        "object": "whatsapp_business_account",
+        "entry": [
+            {
+                "changes": [
+                    {
+                        "value": {
+                            "metadata": {
+                                "phone_number_id": phone_number_id,
+                                "display_phone_number": "+1234567890",
+                            },
+                            "messages": [
+                                {
+                                    "from": settings.WHATSAPP_DEV_PHONE_NUM.get_secret_value(),
+                                    # A unique ID per payload (based on the dev message ID),
+                                    #   so the duplicate-message check doesn't skip messages of other tests
+                                    "id": f"{settings.WHATSAPP_DEV_MESSAGE_ID.get_secret_value()}_{time.time_ns()}",
+                                    "timestamp": str(int(time.time())),
+                                    **message,
+                                }
+                            ],
+                        }
+                    }
+                ]
+            }
+        ],
+    }
+
+
+def post_webhook(client, payload: dict):
+    """POST a webhook payload to the WhatsApp endpoint (as pre-encoded JSON bytes, like Meta does)."""
+    return client.post("/whatsapp/v2", content=orjson.dumps(payload), headers={"Content-Type": "application/json"})
+
+
+def record_calls(monkeypatch, obj: Any, method_name: str) -> list[tuple]:
+    """Wrap an async method of `obj`, so its calls still go through but their arguments get recorded.
+
+    Returns:
+        list[tuple]: The (args, kwargs) of each call, in call order.
+    """
+    calls = []
+    method = getattr(obj, method_name)
+
+    @wraps(method)
+    async def wrapper(*args, **kwargs):
+        calls.append((args, kwargs))
+        return await method(*args, **kwargs)
+
+    monkeypatch.setattr(obj, method_name, wrapper)
+    return calls
+
 
 # Test results storage
 test_results = []
 
+# Challenge sent to the verification endpoint, which must echo it back as the exact response body
+TEST_CHALLENGE = "test_challenge_12345"
+TEST_CHALLENGE_BYTES = TEST_CHALLENGE.encode()
+
 
 def log_test_result_to_list(test_name: str, success: bool, message: str, response_data: Any = None):
     """Log test results."""
@@ -152,17 +264,18 @@ def log_test_result_to_list(test_name: str, success: bool, message: str, respons
     status = "[PASS]" if success else "[FAIL]"
     logger.info(f"{status} {test_name}: {message}")
 
-    if response_data:
-        logger.debug(f"   Response: {json.dumps(result['response_data'], indent=2)}")
+    # Only failed tests get their response logged (compactly, as it's still kept in full in the saved results file)
+    if response_data and not success:
+        logger.opt(lazy=True).info("   Response: {}", lambda: orjson.dumps(result["response_data"]).decode())
 
 
 @pytest.mark.integration
-def test_whatsapp_health():
+def test_whatsapp_health(client):
     """Test ansari-whatsapp health endpoint using TestClient."""
     test_name = "WhatsApp Service Health"
 
     response = client.get("/")
-    response_data = response.json()
+    response_data = orjson.loads(response.content)
 
     if response.status_code == 200 and response_data.get("status") == "ok":
         log_test_result_to_list(test_name, True, "WhatsApp service is healthy", response_data)
@@ -173,23 +286,24 @@ def test_whatsapp_health():
 
 
 @pytest.mark.integration
-def test_webhook_verification(settings):
+def test_webhook_verification(client, settings):
     """Test WhatsApp webhook verification endpoint using TestClient."""
     test_name = "Webhook Verification"
 
     params = {
         "hub.mode": "subscribe",
         "hub.verify_token": settings.META_WEBHOOK_VERIFY_TOKEN.get_secret_value(),
-        "hub.challenge": "test_challenge_12345"
+        "hub.challenge": TEST_CHALLENGE
     }
 
     logger.debug(f"[TEST] Testing {test_name}...")
     logger.debug("   URL: /whatsapp/v2")
-    logger.debug(f"   Params: {format_params_for_logging(params)}")
+    logger.opt(lazy=True).debug("   Params: {}", lambda: format_params_for_logging(params))
 
     response = client.get("/whatsapp/v2", params=params)
 
-    if response.status_code == 200 and "test_challenge_12345" in response.text:
+    # Meta expects the challenge echoed back as the exact body, so the raw bytes are compared directly (no decoding)
+    if response.status_code == 200 and response.content == TEST_CHALLENGE_BYTES:
         log_test_result_to_list(test_name, True, "Webhook verification successful", {"response": response.text})
         assert True
     else:
@@ -199,7 +313,7 @@ def test_webhook_verification(settings):
 
 
 @pytest.mark.integration
-def test_webhook_message_basic(settings):
+def test_webhook_message_basic(client, settings):
     """Test basic WhatsApp webhook message processing using TestClient.
 
     With mock client enabled, this test should always succeed with 200 status.
@@ -215,47 +329,21 @@ def test_webhook_message_basic(settings):
     test_name = "Basic Webhook Message"
 
     try:
-        # Create a minimal WhatsApp webhook payload
-        payload = {
-            "object": "whatsapp_business_account",
-            "entry": [
-                {
-                    "changes": [
-                        {
-                            "value": {
-                                "metadata": {
-                                    "phone_number_id": settings.META_BUSINESS_PHONE_NUMBER_ID.get_secret_value(),
-                                "display_phone_number": "+1234567890"
-                                },
-                                "messages": [
-                                    {
-                                        "from": settings.WHATSAPP_DEV_PHONE_NUM.get_secret_value(),
-                                        "id": settings.WHATSAPP_DEV_MESSAGE_ID.get_secret_value(),
-                                        "timestamp": str(int(time.time())),
-                                        "type": "text",
-                                        "text": {
-                                            "body": "Hello, this is a test message for integration testing"
-                                        }
-                                    }
-                                ]
-                            }
-                        }
-                    ]
-                }
-            ]
-        }
+        payload = build_webhook_payload(
+            settings, {"type": "text", "text": {"body": "Hello, this is a test message for integration testing"}}
+        )
 
         logger.debug(f"[TEST] Testing {test_name}...")
         logger.debug("   URL: /whatsapp/v2")
-        logger.debug(f"   Payload: {format_payload_for_logging(payload)}")
+        logger.opt(lazy=True).debug("   Payload: {}", lambda: format_payload_for_logging(payload))
         logger.debug(f"   Mock mode: {settings.MOCK_ANSARI_CLIENT}")
 
-        response = client.post("/whatsapp/v2", json=payload)
+        response = post_webhook(client, payload)
 
         # With mock client, we should always get 200
         if response.status_code == 200:
             try:
-                response_data = response.json()
+                response_data = orjson.loads(response.content)
                 success = response_data.get("success", False)
                 message = response_data.get("message", "")
 
@@ -267,14 +355,14 @@ def test_webhook_message_basic(settings):
                     logger.debug("   [PASS] Message accepted")
 
                 assert True
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 log_test_result_to_list(test_name, True, "Webhook message accepted", {"status_code": response.status_code})
                 assert True
         else:
             # Non-200 status codes are now considered failures since mock client should handle everything
             response_data = None
             try:
-                response_data = response.json()
+                response_data = orjson.loads(response.content)
             except Exception:
                 response_data = response.text
             log_test_result_to_list(test_name, False, f"Expected 200, got {response.status_code}.", response_data)
@@ -307,14 +395,149 @@ and examples of valid values.
         pytest.fail(f"Test setup failed due to missing environment variables. See error message above. Error: {str(e)}")
 
 
+@pytest.mark.integration
+def test_webhook_duplicate_message(client, settings):
+    """Test that a re-delivered message (i.e., same message ID) is acknowledged but not processed again."""
+    test_name = "Duplicate Webhook Message"
+
+    payload = build_webhook_payload(settings, {"type": "text", "text": {"body": "Hello, this message is sent twice"}})
+
+    first_response = post_webhook(client, payload)
+    second_response = post_webhook(client, payload)
+    first_data = orjson.loads(first_response.content)
+    second_data = orjson.loads(second_response.content)
+
+    success = (
+        first_data.get("error_code") != "DUPLICATE_MESSAGE"
+        and second_response.status_code == 200
+        and second_data.get("error_code") == "DUPLICATE_MESSAGE"
+    )
+    log_test_result_to_list(
+        test_name,
+        success,
+        "Re-delivered message ignored" if success else "Re-delivered message was not detected as a duplicate",
+        {"first": first_data, "second": second_data},
+    )
+    assert success
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize(
+    "phone_number_id",
+    [
+        # Doesn't contain our phone number ID at all (i.e., rejected before the JSON is even decoded)
+        "000000000000000",
+        # Contains our phone number ID as a substring (i.e., rejected only after the payload is parsed)
+        f"{BUSINESS_PHONE_NUMBER_ID}0",
+    ],
+    ids=["unrelated_id", "id_containing_ours"],
+)
+def test_webhook_wrong_phone_number_id(client, settings, phone_number_id):
+    """Test that webhooks addressed to another business phone number are skipped."""
+    test_name = f"Webhook For Another Business Number ({phone_number_id})"
+
+    payload = build_webhook_payload(
+        settings, {"type": "text", "text": {"body": "Hello, this is for another number"}}, phone_number_id=phone_number_id
+    )
+
+    response = post_webhook(client, payload)
+    response_data = orjson.loads(response.content)
+
+    success = (
+        response.status_code == 200
+        and response_data.get("success") is True
+        and "not intended for our WhatsApp business number" in response_data.get("message", "")
+    )
+    log_test_result_to_list(
+        test_name, success, "Webhook skipped" if success else "Webhook was not skipped", response_data
+    )
+    assert success
+
+
+@pytest.mark.integration
+def test_webhook_unsupported_message_type(client, settings, monkeypatch):
+    """Test that non-text messages are acknowledged with 200, and the user is told (in the background) to send text."""
+    test_name = "Unsupported Message Type"
+
+    sent_messages = record_calls(monkeypatch, get_meta_api_service(), "send_message")
+    payload = build_webhook_payload(settings, {"type": "image", "image": {"id": "test_image_id", "mime_type": "image/jpeg"}})
+
+    response = post_webhook(client, payload)
+    response_data = orjson.loads(response.content)
+
+    # NOTE: The TestClient only returns once the webhook's background tasks are done, so the reply was already sent
+    user_phone_num = settings.WHATSAPP_DEV_PHONE_NUM.get_secret_value()
+    notified_user = any(
+        kwargs["recipient_phone"] == user_phone_num and any("can't process images" in part for part in kwargs["message_parts"])
+        for _, kwargs in sent_messages
+    )
+    success = response.status_code == 200 and response_data.get("success") is True and notified_user
+    log_test_result_to_list(
+        test_name,
+        success,
+        "Non-text message acknowledged and user notified" if success else "Non-text message wasn't handled as expected",
+        {"status_code": response.status_code, "response": response_data, "notified_user": notified_user},
+    )
+    assert success
+
+
+@pytest.mark.integration
+def test_webhook_stale_cached_registration(client, settings, monkeypatch):
+    """Test that a user whose cached registration went stale is re-registered, instead of getting an error.
+
+    The first message caches the user's registration, so the second one skips the "user exists" check.
+    Then the (mock) backend loses the user, so creating a thread fails once, after which the user
+    must be re-registered and the thread creation retried (without notifying the user of the failure).
+    """
+    if not settings.MOCK_ANSARI_CLIENT:
+        pytest.skip("Needs the mock Ansari client, to make the backend lose a user")
+
+    test_name = "Stale Cached Registration"
+    text_message = {"type": "text", "text": {"body": "Hello, this is a test message for integration testing"}}
+    ansari_client = get_ansari_client()
+
+    # Make sure the user is registered (and cached), then count the backend calls made from here on
+    post_webhook(client, build_webhook_payload(settings, text_message))
+    exists_checks = record_calls(monkeypatch, ansari_client, "check_user_exists")
+    registrations = record_calls(monkeypatch, ansari_client, "register_user")
+    thread_creations = record_calls(monkeypatch, ansari_client, "create_thread")
+    sent_messages = record_calls(monkeypatch, get_meta_api_service(), "send_message")
+
+    post_webhook(client, build_webhook_payload(settings, text_message))
+    skipped_exists_check = not exists_checks and not registrations
+
+    # The backend loses the user (and their threads), so a new thread is needed for their next message
+    monkeypatch.setattr(ansari_client, "_users", {})
+    monkeypatch.setattr(ansari_client, "_threads", {})
+    post_webhook(client, build_webhook_payload(settings, text_message))
+
+    sent_texts = [part for _, kwargs in sent_messages for part in kwargs["message_parts"]]
+    success = (
+        skipped_exists_check
+        and len(registrations) == 1
+        and len(thread_creations) == 2
+        and not any("error occurred" in text for text in sent_texts)
+    )
+    log_test_result_to_list(
+        test_name,
+        success,
+        "User re-registered and thread creation retried" if success else "Stale cached registration wasn't recovered",
+        {
+            "skipped_exists_check": skipped_exists_check,
+            "registrations": len(registrations),
+            "thread_creations": len(thread_creations),
+            "sent_texts": sent_texts,
+        },
+    )
+    assert success
+
+
 @pytest.fixture(scope="session", autouse=True)
 def save_results():
     """Save test results to file (runs after all tests in the session)."""
     yield  # All tests run here
     
     # Teardown: runs after all tests, even if filtered by -k
-    from datetime import datetime
-
     if test_results:
         results_file = "tests/detailed_test_results_whatsapp_service.json"
 
@@ -323,7 +546,7 @@ def save_results():
 
         combined_results = {
             "test_run": {
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
                 "total_tests": total_tests,
                 "passed_tests": passed_tests,
                 "failed_tests": total_tests - passed_tests,
@@ -332,7 +555,8 @@ def save_results():
             "test_results": test_results
         }
 
-        with open(results_file, "w") as f:
-            json.dump(combined_results, f, indent=2)
+        # orjson serializes (and pretty-prints) in C, and writes the encoded bytes in one go
+        with open(results_file, "wb") as f:
+            f.write(orjson.dumps(combined_results, option=orjson.OPT_INDENT_2))
 
         logger.info(f"Detailed results saved to: {results_file}")